@@ -0,0 +1,121 @@
+"""
+Offline tooling for the canned-reply catalog (messages.json).
+
+Usage:
+  python catalog_tool.py validate
+  python catalog_tool.py generate --language italian [--overwrite]
+"""
+import sys
+import json
+import string
+import argparse
+from typing import Dict, List
+
+from dotenv import load_dotenv
+from langchain_core.prompts import PromptTemplate
+
+from messages import DEFAULT_LANGUAGE, MESSAGES_FILE, load_catalog, normalize_language
+from prompts import TRANSLATION_PROMPT
+
+def placeholders(text: str) -> set:
+    """
+    Returns the set of format placeholders (e.g. {booking_number}) used in text.
+    """
+    return {name for _, name, _, _ in string.Formatter().parse(text) if name}
+
+def validate_catalog(catalog: Dict[str, Dict[str, str]]) -> List[str]:
+    """
+    Checks the catalog for:
+      - messages without a default language entry,
+      - empty or non-string entries,
+      - entries with stray curly braces that cannot be formatted,
+      - translations whose placeholders differ from the default language entry,
+      - languages that are missing some of the messages.
+    Returns a list of problems; an empty list means the catalog is valid.
+    """
+    problems = []
+    languages = set()
+    for message_id, entries in catalog.items():
+        languages.update(entries.keys())
+        if DEFAULT_LANGUAGE not in entries:
+            problems.append(f"{message_id}: missing '{DEFAULT_LANGUAGE}' entry")
+            continue
+        found = {}
+        for language, text in entries.items():
+            if language != normalize_language(language):
+                problems.append(f"{message_id}: language key '{language}' is not normalized")
+            if not isinstance(text, str) or not text.strip():
+                problems.append(f"{message_id}/{language}: empty entry")
+                continue
+            try:
+                found[language] = placeholders(text)
+            except ValueError as e:
+                problems.append(f"{message_id}/{language}: invalid format string ({e})")
+
+        expected = found.get(DEFAULT_LANGUAGE)
+        if expected is None:
+            continue
+        for language, names in found.items():
+            if names != expected:
+                problems.append(f"{message_id}/{language}: placeholders {sorted(names)} differ from {sorted(expected)}")
+
+    for language in sorted(languages):
+        missing = [message_id for message_id, entries in catalog.items() if language not in entries]
+        if missing:
+            problems.append(f"{language}: missing messages {missing} (falls back to {DEFAULT_LANGUAGE})")
+    return problems
+
+def generate_language(catalog: Dict[str, Dict[str, str]], language: str, overwrite: bool = False) -> int:
+    """
+    Translates the default language entries into language using the LLM and
+    adds them to the catalog. Existing entries are kept unless overwrite is set.
+    Returns the number of generated entries.
+    """
+    from llm import LMStudioLLM
+
+    language = normalize_language(language)
+    chain = PromptTemplate(
+        input_variables=["language", "text"],
+        template=TRANSLATION_PROMPT
+    ) | LMStudioLLM(temperature=0)
+
+    generated = 0
+    for message_id, entries in catalog.items():
+        if language in entries and not overwrite:
+            continue
+        entries[language] = chain.invoke({"language": language, "text": entries[DEFAULT_LANGUAGE]}).strip()
+        print(f"{message_id}/{language}: {entries[language]}")
+        generated += 1
+    return generated
+
+def save_catalog(catalog: Dict[str, Dict[str, str]], path: str = MESSAGES_FILE) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(catalog, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+def main() -> int:
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Validate or generate canned-reply catalog entries.")
+    parser.add_argument("--file", default=MESSAGES_FILE, help="path of the message catalog")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("validate", help="check the catalog for missing or inconsistent entries")
+    generate = subparsers.add_parser("generate", help="translate all messages into a language using the LLM")
+    generate.add_argument("--language", required=True, help="target language, e.g. italian")
+    generate.add_argument("--overwrite", action="store_true", help="replace existing entries")
+    args = parser.parse_args()
+
+    catalog = load_catalog(args.file)
+    if args.command == "generate":
+        count = generate_language(catalog, args.language, args.overwrite)
+        save_catalog(catalog, args.file)
+        print(f"Generated {count} entries. Review them before committing.")
+
+    problems = validate_catalog(catalog)
+    for problem in problems:
+        print(problem)
+    if not problems:
+        print(f"Catalog OK: {len(catalog)} messages.")
+    return 1 if problems else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
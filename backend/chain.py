@@ -1,52 +1,154 @@
+import os
 import json
-from typing import Dict, Any
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional
 from langchain_core.prompts import PromptTemplate
 from llm import LMStudioLLM
-from prompts import BOOKING_CONTEXT_PROMPT
+from prompts import BOOKING_CONTEXT_PROMPT, EXTRACTION_PROMPT, REPLY_PROMPT
+from messages import get_message
 
-def update_booking_context(conversation_history: str, current_context: dict, last_user_input: str) -> Dict[str, Any]:
+def invoke_json_chain(chain, input_data: dict, language: Optional[str] = None, max_attempts: int = 3, stats: Optional[dict] = None) -> Dict[str, Any]:
+    """
+    Invokes a chain that is expected to return JSON and parses its output.
+    If the LLM returns invalid JSON, retry with an additional instruction
+    appended to the last user input. Returns a fallback state with a reply in the
+    given language if all attempts fail.
+    If stats is given, the number of attempts and the raw outputs are recorded in it.
+    """
+    attempts = 0
+    last_user_input = input_data["last_user_input"]
+    current_input = dict(input_data)
+    if stats is None:
+        stats = {}
+    stats.setdefault("outputs", [])
+    while attempts < max_attempts:
+        print("CHAIN INPUT:", current_input)
+        chain_output = chain.invoke(current_input)
+        print("CHAIN OUTPUT:", chain_output)
+        stats["outputs"].append(chain_output)
+        stats["attempts"] = attempts + 1
+        try:
+            return json.loads(chain_output)
+        except Exception as e:
+            print("JSON parse error:", e)
+            attempts += 1
+            # On retry, append an instruction for correction to the last user input.
+            current_input["last_user_input"] = f"{last_user_input}\n\nThe payload you returned was invalid JSON, this must be corrected."
+
+    # Fallback if all attempts fail.
+    return {
+        "error": "Invalid JSON returned after multiple attempts.",
+        "response": get_message("rephrase", language)
+    }
+
+def add_usage(stats: dict, *llms: LMStudioLLM) -> None:
+    """
+    Sums the token usage of the given LLMs into stats["usage"].
+    """
+    usage = stats.setdefault("usage", {})
+    for llm in llms:
+        for key, value in llm.usage.items():
+            usage[key] = usage.get(key, 0) + value
+
+def get_reply(call, *args) -> str:
+    """
+    Runs the reply generation call. The reply is the non-critical half of a split
+    update, so errors are logged and an empty reply is returned, which is later
+    replaced by the canned fallback reply.
+    """
+    try:
+        return call(*args)
+    except Exception as e:
+        logging.warning(f"Reply generation failed, using fallback reply: {e}")
+        return ""
+
+def update_booking_context(conversation_history: str, current_context: dict, last_user_input: str, stats: Optional[dict] = None) -> Dict[str, Any]:
     """
     Uses a LangChain chain to update the booking context based on:
       - the full conversation history,
       - the current booking context (serialized as JSON),
       - the last user input.
     Returns a dictionary matching the booking context schema.
-    
+
+    With SPLIT_CHAIN=true the extraction and the reply are produced by two
+    separate calls (see split_update_booking_context), otherwise one call does both.
     If the LLM returns invalid JSON, retry up to 2 times with additional instructions.
+    If stats is given, attempts, raw LLM outputs and token usage are recorded in it.
     """
+    if stats is None:
+        stats = {}
+    if os.getenv("SPLIT_CHAIN", "false").lower() == "true":
+        return split_update_booking_context(conversation_history, current_context, last_user_input, stats)
+
     template = PromptTemplate(
         input_variables=["history", "context", "last_user_input"],
         template=BOOKING_CONTEXT_PROMPT
     )
     llm = LMStudioLLM()
     chain = template | llm
-    
-    def run_chain(last_input: str) -> str:
-        input_data = {
-            "history": conversation_history,
-            "context": json.dumps(current_context),
-            "last_user_input": last_input
-        }
-        print("CHAIN INPUT:", input_data)
-        return chain.invoke(input_data)
-    
-    attempts = 0
-    max_attempts = 3
-    current_input = last_user_input
-    while attempts < max_attempts:
-        chain_output = run_chain(current_input)
-        print("CHAIN OUTPUT:", chain_output)
-        try:
-            state = json.loads(chain_output)
-            return state
-        except Exception as e:
-            print("JSON parse error:", e)
-            attempts += 1
-            # On retry, append an instruction for correction to the last user input.
-            current_input = f"{last_user_input}\n\nThe payload you returned was invalid JSON, this must be corrected."
-    
-    # Fallback if all attempts fail.
-    return {
-        "error": "Invalid JSON returned after multiple attempts.",
-        "response": "I'm sorry, I didn't understand that. Could you please rephrase your last message?"
+
+    input_data = {
+        "history": conversation_history,
+        "context": json.dumps(current_context),
+        "last_user_input": last_user_input
     }
+    state = invoke_json_chain(chain, input_data, current_context.get("language"), stats=stats)
+    add_usage(stats, llm)
+    return state
+
+def split_update_booking_context(conversation_history: str, current_context: dict, last_user_input: str, stats: Optional[dict] = None) -> Dict[str, Any]:
+    """
+    Updates the booking context with two calls:
+      - a short, deterministic extraction call returning the booking JSON,
+      - a reply generation call returning the free-text response.
+    With SPECULATIVE_REPLY=true (default) both calls run concurrently and the reply
+    is based on the previous context; otherwise the reply waits for the extracted state.
+    The reply is merged into the extracted state as "response".
+    """
+    if stats is None:
+        stats = {}
+    extraction_llm = LMStudioLLM(
+        temperature=float(os.getenv("EXTRACTION_TEMPERATURE", "0")),
+        max_tokens=int(os.getenv("EXTRACTION_MAX_TOKENS", "300"))
+    )
+    reply_llm = LMStudioLLM(
+        temperature=float(os.getenv("REPLY_TEMPERATURE", "0.7")),
+        max_tokens=int(os.getenv("REPLY_MAX_TOKENS", "200"))
+    )
+    extraction_chain = PromptTemplate(
+        input_variables=["history", "context", "last_user_input"],
+        template=EXTRACTION_PROMPT
+    ) | extraction_llm
+    reply_chain = PromptTemplate(
+        input_variables=["history", "context", "last_user_input"],
+        template=REPLY_PROMPT
+    ) | reply_llm
+
+    input_data = {
+        "history": conversation_history,
+        "context": json.dumps(current_context),
+        "last_user_input": last_user_input
+    }
+
+    if os.getenv("SPECULATIVE_REPLY", "true").lower() == "true":
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            state_future = executor.submit(invoke_json_chain, extraction_chain, input_data, current_context.get("language"), stats=stats)
+            reply_future = executor.submit(reply_chain.invoke, input_data)
+            state = state_future.result()
+            reply = get_reply(reply_future.result)
+    else:
+        state = invoke_json_chain(extraction_chain, input_data, current_context.get("language"), stats=stats)
+        if "error" in state:
+            add_usage(stats, extraction_llm)
+            return state
+        reply = get_reply(reply_chain.invoke, {**input_data, "context": json.dumps(state)})
+
+    add_usage(stats, extraction_llm, reply_llm)
+    if "error" in state:
+        return state
+
+    print("REPLY OUTPUT:", reply)
+    stats["reply"] = reply
+    state["response"] = reply.strip() or get_message("fallback", state.get("language"))
+    return state
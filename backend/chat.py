@@ -3,13 +3,15 @@ import json
 import logging
 import random
 import string
+import time
 from fastapi import APIRouter
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
 from llm import LMStudioLLM
 from chain import update_booking_context
-from prompts import INIT_PROMPT
+from recorder import record_turn
+from messages import get_message, is_message
 from database import init_db, upsert_booking, get_booking_by_number_and_name
 
 load_dotenv()
@@ -95,11 +97,12 @@ def rectify_context(session_id: str, state: dict) -> dict:
 
     booking_number = state.get("booking_number")
     full_name = state.get("full_name")
+    language = state.get("language")
     print(f"FOUND booking_number={booking_number} | full_name={full_name}")
 
     # Request identity for modify/cancel
     if intent in ["modify", "cancel"] and (not full_name or not booking_number):
-        state["response"] = "To proceed with your request, please provide your full name and reservation number."
+        state["response"] = get_message("identity_required", language)
         if chat_history.get(session_id) and chat_history[session_id][-1]["sender"] == "bot":
             chat_history[session_id].pop()
         chat_history[session_id].append({"text": state["response"], "sender": "bot"})
@@ -109,7 +112,7 @@ def rectify_context(session_id: str, state: dict) -> dict:
     if status in ["pending", "confirmed"] and not is_booking_complete(state):
         logging.info(f"[Session {session_id}] Rectifying incomplete booking (was '{status}')")
         state["status"] = "draft"
-        state["response"] = "Some required details are missing. Please provide all required information before confirming the booking."
+        state["response"] = get_message("details_missing", language)
         if chat_history.get(session_id) and chat_history[session_id][-1]["sender"] == "bot":
             chat_history[session_id].pop()
         chat_history[session_id].append({"text": state["response"], "sender": "bot"})
@@ -124,6 +127,7 @@ def execute_actions(session_id: str, state: dict) -> dict:
     status = state.get("status")
     booking_number = state.get("booking_number")
     full_name = state.get("full_name")
+    language = state.get("language")
 
     logging.info(f"[Session {session_id}] Action Dispatch — intent: {intent}, status: {status}, booking_number: {booking_number}, name: {full_name}")
     logging.info(f"[Session {session_id}] Booking context completeness check:")
@@ -135,7 +139,7 @@ def execute_actions(session_id: str, state: dict) -> dict:
         chat_history[session_id] = []
         logging.info(f"[Session {session_id}] Reset executed.")
         return {
-            "reply": INIT_PROMPT,
+            "reply": get_message("init", language),
             "context": transform_context({}),
             "reset": True
         }
@@ -148,6 +152,7 @@ def execute_actions(session_id: str, state: dict) -> dict:
             for key, value in db_booking.items():
                 if not state.get(key):
                     state[key] = value
+            language = state.get("language")
 
             # Re-check completeness and promote status if appropriate
             if is_booking_complete(state) and intent == "cancel":
@@ -155,23 +160,23 @@ def execute_actions(session_id: str, state: dict) -> dict:
                 logging.info(f"[Session {session_id}] Booking context is now complete — promoting to 'confirmed' for cancellation.")
 
             # Fix misleading message from rectify_context
-            if chat_history.get(session_id) and "Some required details are missing" in chat_history[session_id][-1]["text"]:
+            if chat_history.get(session_id) and is_message(chat_history[session_id][-1]["text"], "details_missing"):
                 chat_history[session_id].pop()
 
             # Respond after enrichment
             if intent == "smalltalk":
-                state["response"] = "I’ve found your reservation. What would you like to do with your booking?"
+                state["response"] = get_message("booking_found", language)
             elif intent == "cancel":
-                state["response"] = "Please confirm if you want to cancel this reservation."
+                state["response"] = get_message("cancel_confirm", language)
             elif intent == "modify":
-                state["response"] = "I've loaded your booking. What would you like to change?"
+                state["response"] = get_message("booking_loaded", language)
             else:
-                state["response"] = "I’ve found your reservation and updated your booking details."
+                state["response"] = get_message("booking_updated", language)
             chat_history[session_id].append({"text": state["response"], "sender": "bot"})
 
         else:
             logging.warning(f"[Session {session_id}] No booking found for name='{full_name}' and number='{booking_number}'")
-            state["response"] = "Sorry, I couldn't find a booking with that name and number. Please double-check your details."
+            state["response"] = get_message("booking_not_found", language)
             state["booking_number"] = None
             chat_history[session_id].append({"text": state["response"], "sender": "bot"})
 
@@ -185,7 +190,7 @@ def execute_actions(session_id: str, state: dict) -> dict:
         booking_contexts[session_id] = {}
         chat_history[session_id] = []
 
-        response = "Your reservation has been cancelled as requested. If you'd like to make a new booking, just let me know!"
+        response = get_message("booking_cancelled", language)
         chat_history[session_id].append({"text": response, "sender": "bot"})
 
         return {
@@ -202,12 +207,12 @@ def execute_actions(session_id: str, state: dict) -> dict:
                 state["booking_number"] = generate_booking_number()
             upsert_booking(state)
             logging.info(f"[Session {session_id}] Booking upserted into DB.")
-            state["response"] = state.get("response", "Your booking is confirmed.")
+            state["response"] = state.get("response", get_message("booking_confirmed", language))
             chat_history[session_id].append({"text": state["response"], "sender": "bot"})
 
     # 🧾 FALLBACK
     if not state.get("response"):
-        state["response"] = "I'm here to help you with your booking."
+        state["response"] = get_message("fallback", language)
         chat_history[session_id].append({"text": state["response"], "sender": "bot"})
 
     return {
@@ -230,9 +235,9 @@ def chat_endpoint(request: ChatRequest):
     if session_id not in booking_contexts:
         booking_contexts[session_id] = {}
         chat_history[session_id] = []
-        chat_history[session_id].append({"text": INIT_PROMPT, "sender": "bot"})
+        chat_history[session_id].append({"text": get_message("init"), "sender": "bot"})
         logging.info(f"[Session {session_id}] New session. Sending init message.")
-        return {"reply": INIT_PROMPT, "context": transform_context({})}
+        return {"reply": get_message("init"), "context": transform_context({})}
 
     # Append user message
     chat_history[session_id].append({"text": user_message, "sender": "user"})
@@ -241,7 +246,13 @@ def chat_endpoint(request: ChatRequest):
     conv_history = "\n".join(f"{msg['sender']}: {msg['text']}" for msg in chat_history[session_id])
 
     # Run LLM and update context
-    updated_context = update_booking_context(conv_history, booking_contexts[session_id], user_message)
+    stats = {}
+    started = time.perf_counter()
+    updated_context = update_booking_context(conv_history, booking_contexts[session_id], user_message, stats)
+    duration_ms = (time.perf_counter() - started) * 1000
+
+    # Record the turn for offline replay (only if CAPTURE_FILE is set)
+    record_turn(session_id, conv_history, booking_contexts[session_id], user_message, updated_context, duration_ms, stats)
 
     # Rectify context if LLM logic was off
     updated_context = rectify_context(session_id, updated_context)
@@ -1,11 +1,19 @@
 import os
 import requests
+from typing import Dict, Optional
 from langchain.llms.base import LLM
 
 class LMStudioLLM(LLM):
     """
     A simple LangChain-compatible LLM wrapper for LM Studio.
+    Sampling temperature and the output token cap can be set per instance,
+    so extraction and reply calls can use different settings.
+    Token usage reported by the server is accumulated in `usage`.
     """
+    temperature: float = 0.7
+    max_tokens: Optional[int] = None
+    usage: Dict[str, int] = {}
+
     @property
     def _llm_type(self) -> str:
         return "lmstudio"
@@ -20,15 +28,21 @@ class LMStudioLLM(LLM):
             "messages": [
                 {"role": "user", "content": prompt}
             ],
-            "temperature": 0.7,
+            "temperature": self.temperature,
         }
+        if self.max_tokens:
+            payload["max_tokens"] = self.max_tokens
         response = requests.post(
             f"{LMSTUDIO_URL}/chat/completions",
             json=payload,
             headers={"Authorization": f"Bearer {api_key}"}
         )
         response.raise_for_status()
-        return response.json()["choices"][0]["message"]["content"]
+        data = response.json()
+        for key, value in data.get("usage", {}).items():
+            if isinstance(value, int):
+                self.usage[key] = self.usage.get(key, 0) + value
+        return data["choices"][0]["message"]["content"]
 
     def predict(self, prompt: str) -> str:
         return self._call(prompt)
@@ -0,0 +1,60 @@
+import os
+import json
+import logging
+from typing import Dict, Optional
+
+DEFAULT_LANGUAGE = "english"
+MESSAGES_FILE = os.getenv("MESSAGES_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "messages.json"))
+
+# Maps language codes and native names to the catalog language keys.
+LANGUAGE_ALIASES = {
+    "en": "english",
+    "de": "german",
+    "deutsch": "german",
+    "fr": "french",
+    "français": "french",
+    "francais": "french",
+    "es": "spanish",
+    "español": "spanish",
+    "espanol": "spanish",
+}
+
+def load_catalog(path: str = MESSAGES_FILE) -> Dict[str, Dict[str, str]]:
+    """
+    Loads the message catalog (message id -> language -> text) from a JSON file.
+    """
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+# Loaded once at import time and kept in memory.
+CATALOG = load_catalog()
+
+def normalize_language(language: Optional[str]) -> str:
+    """
+    Maps a language as tracked in the booking state (e.g. "English", "deutsch", "de")
+    to a catalog language key. Defaults to english.
+    """
+    if not language:
+        return DEFAULT_LANGUAGE
+    language = language.strip().lower()
+    return LANGUAGE_ALIASES.get(language, language)
+
+def get_message(message_id: str, language: Optional[str] = None, **kwargs) -> str:
+    """
+    Returns the canned reply for message_id in the given language, with
+    placeholders (e.g. {booking_number}) filled in from kwargs.
+    Falls back to english if the language has no entry for this message.
+    Raises KeyError for unknown message ids.
+    """
+    entries = CATALOG[message_id]
+    key = normalize_language(language)
+    if key not in entries:
+        logging.info(f"No '{key}' translation for message '{message_id}', falling back to {DEFAULT_LANGUAGE}.")
+        key = DEFAULT_LANGUAGE
+    return entries[key].format(**kwargs) if kwargs else entries[key]
+
+def is_message(text: str, message_id: str) -> bool:
+    """
+    Checks whether text is the canned reply message_id in any language.
+    """
+    return text in CATALOG[message_id].values()
@@ -0,0 +1,66 @@
+import os
+import gzip
+import json
+import zlib
+import logging
+import time
+import threading
+from typing import Dict, Iterator, Optional
+
+_lock = threading.Lock()
+
+def record_turn(session_id: str, history: str, context: dict, user_input: str, state: dict, duration_ms: float, stats: dict, path: Optional[str] = None) -> None:
+    """
+    Appends one conversation turn (input, prior context, LLM output including the
+    raw reply of split calls, timings and token usage) to the capture log as a
+    gzip-compressed JSON line.
+    Does nothing if no capture file is configured (CAPTURE_FILE).
+    Capturing must never break a booking, so write errors are only logged.
+    """
+    path = path or os.getenv("CAPTURE_FILE")
+    if not path:
+        return
+    record = {
+        "ts": time.time(),
+        "session_id": session_id,
+        "model": os.getenv("MODEL"),
+        "split_chain": os.getenv("SPLIT_CHAIN", "false").lower() == "true",
+        "history": history,
+        "context": context,
+        "user_input": user_input,
+        "state": state,
+        "outputs": stats.get("outputs", []),
+        "reply": stats.get("reply"),
+        "attempts": stats.get("attempts", 0),
+        "usage": stats.get("usage", {}),
+        "duration_ms": round(duration_ms, 1),
+    }
+    try:
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        # Each append is a separate gzip member; gzip readers concatenate them transparently.
+        with _lock, gzip.open(path, "at", encoding="utf-8") as f:
+            f.write(line)
+    except Exception as e:
+        logging.warning(f"[Session {session_id}] Failed to record turn to '{path}': {e}")
+
+def read_turns(path: str) -> Iterator[Dict]:
+    """
+    Yields the recorded turns of a capture log in recording order.
+    Undecodable lines are skipped, and reading stops at a truncated or corrupt
+    tail (e.g. an interrupted write), so the turns before it can still be used.
+    """
+    line_number = 0
+    # Read in binary mode, so complete lines before a broken gzip member are not lost in a text buffer.
+    with gzip.open(path, "rb") as f:
+        try:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    turn = json.loads(line.decode("utf-8"))
+                except ValueError as e:
+                    logging.warning(f"Skipping undecodable line {line_number} of capture log '{path}': {e}")
+                    continue
+                yield turn
+        except (EOFError, gzip.BadGzipFile, zlib.error) as e:
+            logging.warning(f"Capture log '{path}' is truncated or corrupt after line {line_number}, stopping: {e}")
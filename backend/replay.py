@@ -0,0 +1,147 @@
+"""
+Replays recorded conversation turns (see recorder.py) against an OpenAI-compatible
+endpoint and compares latency, token usage, JSON retries and the extracted booking
+state with the recording.
+
+Usage:
+  python replay.py captures.jsonl.gz --url http://localhost:1234/v1 --model llama-3.2-3b-instruct --parallel 4
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from dotenv import load_dotenv
+
+from chain import update_booking_context
+from recorder import read_turns
+
+# Booking state fields compared between recording and replay.
+COMPARED_FIELDS = [
+    "full_name", "check_in_date", "check_out_date", "num_guests", "payment_method",
+    "breakfast_included", "status", "last_intent", "language"
+]
+
+def normalize_value(value):
+    """
+    Normalizes a state value for comparison, so that e.g. 2 and "2" or "Yes" and "yes" agree.
+    """
+    if value is None or value == "":
+        return None
+    return str(value).strip().lower()
+
+def replay_turn(turn: Dict) -> Dict:
+    """
+    Re-runs a single recorded turn and returns the replayed state, stats and duration.
+    """
+    stats = {}
+    started = time.perf_counter()
+    try:
+        state = update_booking_context(turn["history"], turn["context"], turn["user_input"], stats)
+    except Exception as e:
+        state = {"error": str(e)}
+    duration_ms = (time.perf_counter() - started) * 1000
+    return {"turn": turn, "state": state, "stats": stats, "duration_ms": duration_ms}
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return float(values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))])
+
+def summarize(durations: List[float], usages: List[Dict], attempts: List[int], errors: int) -> Dict:
+    """
+    Aggregates latency, token usage, retry and error rate of a set of turns.
+    """
+    count = len(durations)
+    return {
+        "turns": count,
+        "latency_mean_ms": float(statistics.mean(durations)) if durations else 0.0,
+        "latency_p50_ms": percentile(durations, 50),
+        "latency_p95_ms": percentile(durations, 95),
+        "prompt_tokens": sum(u.get("prompt_tokens", 0) for u in usages),
+        "completion_tokens": sum(u.get("completion_tokens", 0) for u in usages),
+        "json_retry_rate": sum(1 for a in attempts if a > 1) / count if count else 0.0,
+        "error_rate": errors / count if count else 0.0,
+    }
+
+def field_agreement(results: List[Dict]) -> Dict[str, float]:
+    """
+    Returns, per compared field, the share of turns where the replayed state
+    matches the recorded state. Turns where either side failed are skipped.
+    """
+    valid = [r for r in results if "error" not in r["state"] and "error" not in r["turn"]["state"]]
+    agreement = {}
+    for field in COMPARED_FIELDS:
+        matches = sum(
+            1 for r in valid
+            if normalize_value(r["state"].get(field)) == normalize_value(r["turn"]["state"].get(field))
+        )
+        agreement[field] = matches / len(valid) if valid else 0.0
+    return agreement
+
+def build_report(results: List[Dict]) -> Dict:
+    recorded = summarize(
+        [r["turn"]["duration_ms"] for r in results],
+        [r["turn"].get("usage", {}) for r in results],
+        [r["turn"].get("attempts", 0) for r in results],
+        sum(1 for r in results if "error" in r["turn"]["state"])
+    )
+    replayed = summarize(
+        [r["duration_ms"] for r in results],
+        [r["stats"].get("usage", {}) for r in results],
+        [r["stats"].get("attempts", 0) for r in results],
+        sum(1 for r in results if "error" in r["state"])
+    )
+    return {"recorded": recorded, "replayed": replayed, "agreement": field_agreement(results)}
+
+def print_report(report: Dict) -> None:
+    print(f"{'metric':<20}{'recorded':>12}{'replayed':>12}")
+    for key in report["recorded"]:
+        recorded, replayed = report["recorded"][key], report["replayed"][key]
+        if isinstance(recorded, float):
+            print(f"{key:<20}{recorded:>12.2f}{replayed:>12.2f}")
+        else:
+            print(f"{key:<20}{recorded:>12}{replayed:>12}")
+    print()
+    print("field agreement with recorded state:")
+    for field, share in report["agreement"].items():
+        print(f"  {field:<20}{share:>8.1%}")
+
+def main() -> int:
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Replay recorded conversations against an OpenAI-compatible endpoint.")
+    parser.add_argument("capture_file", help="capture log written with CAPTURE_FILE")
+    parser.add_argument("--url", help="endpoint base URL (default: LMSTUDIO_URL)")
+    parser.add_argument("--model", help="model name (default: MODEL)")
+    parser.add_argument("--api-key", help="API key (default: LMSTUDIO_API_KEY)")
+    parser.add_argument("--split", choices=["true", "false"], help="override SPLIT_CHAIN")
+    parser.add_argument("--parallel", type=int, default=1, help="number of turns replayed concurrently")
+    parser.add_argument("--limit", type=int, help="replay only the first N turns")
+    parser.add_argument("--verbose", action="store_true", help="show chain input/output")
+    args = parser.parse_args()
+
+    # The LLM wrapper and the chain read their configuration from the environment.
+    for name, value in [("LMSTUDIO_URL", args.url), ("MODEL", args.model), ("LMSTUDIO_API_KEY", args.api_key), ("SPLIT_CHAIN", args.split)]:
+        if value:
+            os.environ[name] = value
+
+    turns = list(read_turns(args.capture_file))[:args.limit]
+    if not turns:
+        print("No recorded turns found.")
+        return 1
+    print(f"Replaying {len(turns)} turns against {os.getenv('MODEL')} at {os.getenv('LMSTUDIO_URL')} (parallel={args.parallel})")
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(sys.stdout if args.verbose else devnull):
+        with ThreadPoolExecutor(max_workers=max(1, args.parallel)) as executor:
+            results = list(executor.map(replay_turn, turns))
+
+    print_report(build_report(results))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
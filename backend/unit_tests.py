@@ -1,3 +1,5 @@
+import json
+import threading
 import pytest
 from fastapi.testclient import TestClient
 from chat import chat_endpoint, rectify_context, execute_actions, transform_context
@@ -94,3 +96,228 @@ def test_api_get_history():
     assert response.status_code == 200
     history = response.json()["history"]
     assert len(history) > 0
+
+class FakeResponse:
+    def __init__(self, content, usage=None):
+        self.content = content
+        self.usage = usage or {}
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"choices": [{"message": {"content": self.content}}], "usage": self.usage}
+
+def test_split_update_booking_context(monkeypatch):
+    from chain import update_booking_context
+
+    payloads = []
+
+    def fake_post(url, json=None, headers=None):
+        payloads.append(json)
+        if "Return ONLY valid and pure JSON" in json["messages"][0]["content"]:
+            return FakeResponse('{"full_name": "Jane Doe", "status": "draft", "last_intent": "book", "language": "english"}')
+        return FakeResponse("Thanks Jane! When would you like to check in?")
+
+    monkeypatch.setattr("llm.requests.post", fake_post)
+    monkeypatch.setenv("SPLIT_CHAIN", "true")
+    monkeypatch.setenv("REPLY_TEMPERATURE", "0.5")
+    monkeypatch.setenv("REPLY_MAX_TOKENS", "150")
+    state = update_booking_context("user: I'm Jane Doe", {}, "I'm Jane Doe")
+    assert state["full_name"] == "Jane Doe"
+    assert state["response"] == "Thanks Jane! When would you like to check in?"
+
+    extraction, reply = sorted(payloads, key=lambda p: "Return ONLY valid and pure JSON" not in p["messages"][0]["content"])
+    assert extraction["temperature"] == 0
+    assert extraction["max_tokens"] == 300
+    assert reply["temperature"] == 0.5
+    assert reply["max_tokens"] == 150
+
+def test_split_update_booking_context_reply_failure(monkeypatch):
+    from chain import update_booking_context
+    from llm import LMStudioLLM
+    from messages import get_message
+
+    def fake_call(self, prompt, stop=None, **kwargs):
+        if "Return ONLY valid and pure JSON" in prompt:
+            return '{"full_name": "Jane Doe", "status": "draft", "last_intent": "book", "language": "german"}'
+        raise TimeoutError("reply call timed out")
+
+    monkeypatch.setattr(LMStudioLLM, "_call", fake_call)
+    monkeypatch.setenv("SPLIT_CHAIN", "true")
+    state = update_booking_context("user: I'm Jane Doe", {}, "I'm Jane Doe")
+    assert state["full_name"] == "Jane Doe"
+    assert state["response"] == get_message("fallback", "german")
+
+def test_split_update_booking_context_reply_language(monkeypatch):
+    from chain import update_booking_context
+    from llm import LMStudioLLM
+
+    prompts = []
+
+    def fake_call(self, prompt, stop=None, **kwargs):
+        prompts.append(prompt)
+        if "Return ONLY valid and pure JSON" in prompt:
+            return '{"status": "draft", "last_intent": "book", "language": "german"}'
+        return "Gerne! Wie ist Ihr vollständiger Name?"
+
+    monkeypatch.setattr(LMStudioLLM, "_call", fake_call)
+    monkeypatch.setenv("SPLIT_CHAIN", "true")
+    monkeypatch.setenv("SPECULATIVE_REPLY", "true")
+    user_input = "Ich möchte ein Zimmer buchen"
+    update_booking_context(f"user: {user_input}", {"language": "english"}, user_input)
+
+    reply_prompt = next(p for p in prompts if "Return ONLY the reply text" in p)
+    assert "Always reply in the language of the last user input" in reply_prompt
+    assert '"language": "english"' in reply_prompt
+    assert user_input in reply_prompt
+
+def test_split_update_booking_context_sequential(monkeypatch):
+    from chain import update_booking_context
+    from llm import LMStudioLLM
+
+    prompts = []
+    extracted = '{"full_name": "Jane Doe", "status": "draft", "last_intent": "book", "language": "english"}'
+
+    def fake_call(self, prompt, stop=None, **kwargs):
+        prompts.append(prompt)
+        if "Return ONLY valid and pure JSON" in prompt:
+            return extracted
+        return "Thanks Jane! When would you like to check in?"
+
+    monkeypatch.setattr(LMStudioLLM, "_call", fake_call)
+    monkeypatch.setenv("SPLIT_CHAIN", "true")
+    monkeypatch.setenv("SPECULATIVE_REPLY", "false")
+    state = update_booking_context("user: I'm Jane Doe", {}, "I'm Jane Doe")
+    assert state["response"] == "Thanks Jane! When would you like to check in?"
+    reply_prompt = next(p for p in prompts if "Return ONLY the reply text" in p)
+    assert f"Current booking context: {json.dumps(json.loads(extracted))}" in reply_prompt
+
+    # An extraction error skips the reply call.
+    prompts.clear()
+    extracted = "not json"
+    state = update_booking_context("user: I'm Jane Doe", {}, "I'm Jane Doe")
+    assert "error" in state
+    assert not any("Return ONLY the reply text" in p for p in prompts)
+
+def test_split_update_booking_context_runs_concurrently(monkeypatch):
+    from chain import update_booking_context
+    from llm import LMStudioLLM
+
+    # Both calls must reach the barrier before either can return; fails if they run one after the other.
+    barrier = threading.Barrier(2, timeout=5)
+
+    def fake_call(self, prompt, stop=None, **kwargs):
+        barrier.wait()
+        if "Return ONLY valid and pure JSON" in prompt:
+            return '{"full_name": "Jane Doe", "status": "draft", "last_intent": "book", "language": "english"}'
+        return "Thanks Jane!"
+
+    monkeypatch.setattr(LMStudioLLM, "_call", fake_call)
+    monkeypatch.setenv("SPLIT_CHAIN", "true")
+    monkeypatch.setenv("SPECULATIVE_REPLY", "true")
+    state = update_booking_context("user: I'm Jane Doe", {}, "I'm Jane Doe")
+    assert state["full_name"] == "Jane Doe"
+    assert state["response"] == "Thanks Jane!"
+
+def test_get_message_language_fallback():
+    from messages import get_message
+    assert get_message("fallback", "Deutsch") == get_message("fallback", "german")
+    assert get_message("fallback", "klingon") == get_message("fallback", "english")
+    assert get_message("fallback", None) == "I'm here to help you with your booking."
+
+def test_rectify_context_localized_response():
+    session_id = "test_session_6"
+    state = {"status": "draft", "last_intent": "cancel", "language": "german"}
+
+    from chat import chat_history
+    from messages import get_message
+    chat_history[session_id] = []
+
+    updated = rectify_context(session_id, state)
+    assert updated["response"] == get_message("identity_required", "german")
+
+def test_message_catalog_is_valid():
+    from catalog_tool import validate_catalog
+    from messages import CATALOG
+    assert validate_catalog(CATALOG) == []
+
+def test_validate_catalog_reports_invalid_entries():
+    from catalog_tool import validate_catalog
+    catalog = {
+        "greeting": {
+            "english": "Hello {full_name}!",
+            "german": "Hallo {vollständiger_name}!",
+            "french": "Bonjour {full_name}}!"
+        }
+    }
+    problems = validate_catalog(catalog)
+    assert any(p.startswith("greeting/german: placeholders") for p in problems)
+    assert any(p.startswith("greeting/french: invalid format string") for p in problems)
+
+def test_get_message_formats_placeholders(monkeypatch):
+    import messages
+    monkeypatch.setitem(messages.CATALOG, "greeting", {"english": "Hello {full_name}!"})
+    assert messages.get_message("greeting", "german", full_name="Jane Doe") == "Hello Jane Doe!"
+
+def test_record_and_replay_report(tmp_path):
+    from recorder import record_turn, read_turns
+    from replay import build_report
+
+    capture_file = str(tmp_path / "captures.jsonl.gz")
+    state = {"full_name": "Jane Doe", "num_guests": 2, "status": "draft", "last_intent": "book"}
+    stats = {"attempts": 2, "usage": {"prompt_tokens": 100, "completion_tokens": 20}, "reply": "Hello Jane!"}
+    record_turn("test_session_7", "user: hi", {}, "hi", state, 850.0, stats, path=capture_file)
+    record_turn("test_session_7", "user: hi", {}, "hi", state, 950.0, stats, path=capture_file)
+
+    turns = list(read_turns(capture_file))
+    assert len(turns) == 2
+    assert turns[0]["usage"]["prompt_tokens"] == 100
+    assert turns[0]["reply"] == "Hello Jane!"
+
+    results = [
+        {"turn": turn, "state": {**state, "num_guests": "2", "status": "pending"}, "stats": {"attempts": 1}, "duration_ms": 500.0}
+        for turn in turns
+    ]
+    report = build_report(results)
+    assert report["recorded"]["json_retry_rate"] == 1.0
+    assert report["replayed"]["json_retry_rate"] == 0.0
+    assert report["agreement"]["num_guests"] == 1.0
+    assert report["agreement"]["status"] == 0.0
+
+def test_record_turn_write_failure_is_ignored(tmp_path, caplog):
+    import os
+    from recorder import record_turn
+    capture_file = str(tmp_path / "missing" / "captures.jsonl.gz")
+    record_turn("test_session_8", "user: hi", {}, "hi", {"status": "draft"}, 100.0, {}, path=capture_file)
+    assert not os.path.exists(capture_file)
+    assert "Failed to record turn" in caplog.text
+
+def test_read_turns_truncated_capture_file(tmp_path, caplog):
+    from recorder import record_turn, read_turns
+    capture_file = tmp_path / "captures.jsonl.gz"
+    for i in range(3):
+        record_turn("test_session_9", "user: hi", {}, "hi", {"turn": i}, 100.0, {}, path=str(capture_file))
+    capture_file.write_bytes(capture_file.read_bytes()[:-10])
+
+    turns = list(read_turns(str(capture_file)))
+    assert [turn["state"]["turn"] for turn in turns[:2]] == [0, 1]
+    assert "truncated or corrupt" in caplog.text
+
+def test_update_booking_context_stats(monkeypatch):
+    from chain import update_booking_context
+
+    responses = [
+        FakeResponse("not json", {"prompt_tokens": 100, "completion_tokens": 10, "total_tokens": 110}),
+        FakeResponse('{"full_name": "Jane Doe", "status": "draft", "last_intent": "book", "language": "english", "response": "Hi Jane!"}',
+                     {"prompt_tokens": 120, "completion_tokens": 30, "total_tokens": 150}),
+    ]
+    monkeypatch.setattr("llm.requests.post", lambda url, json=None, headers=None: responses.pop(0))
+    monkeypatch.setenv("SPLIT_CHAIN", "false")
+
+    stats = {}
+    state = update_booking_context("user: I'm Jane Doe", {}, "I'm Jane Doe", stats)
+    assert state["full_name"] == "Jane Doe"
+    assert stats["attempts"] == 2
+    assert len(stats["outputs"]) == 2
+    assert stats["usage"] == {"prompt_tokens": 220, "completion_tokens": 40, "total_tokens": 260}